@@ -1,24 +1,60 @@
 # Copyright 2024-2025 The MathWorks, Inc.
 import asyncio
+import functools
 import os
-import secrets
 import subprocess
-from typing import List, Optional, Tuple
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
 
 import matlab_proxy
 import matlab_proxy.util.system as mwi_sys
 import matlab_proxy.util.mwi.environment_variables as mwi_env
 from matlab_proxy_manager.storage.file_repository import FileRepository
 from matlab_proxy_manager.storage.server import ServerProcess
-from matlab_proxy_manager.utils import constants, helpers, logger, exceptions
+from matlab_proxy_manager.utils import auth, constants, helpers, logger, exceptions
 
 # Used to list all the public-facing APIs exported by this module.
 __all__ = ["shutdown", "start_matlab_proxy_for_kernel", "start_matlab_proxy_for_jsp"]
 
-log = logger.get()
-shutdown_lock = asyncio.Lock()
 log = logger.get(init=True)
 
+# Locks serializing the shutdown of each matlab proxy server, keyed by server id.
+# Locks are created lazily and kept per event loop, as an asyncio lock can't be
+# shared across event loops. A lock is only kept while a shutdown holds or waits on
+# it, so that the locks of all servers ever shut down don't pile up.
+_shutdown_locks: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+# Time (in seconds) for which a new matlab proxy server is probed until it is ready
+_SERVER_READY_TIMEOUT = 60.0
+
+# Minimum interval (in seconds) between cleanups of orphaned servers for the same context
+_ORPHAN_SWEEP_MIN_INTERVAL = 5.0
+
+# Time (from time.monotonic) of the last cleanup of orphaned servers, keyed by context
+_last_orphan_sweeps: Dict[str, float] = {}
+
+# Starts of new matlab proxy servers that are in progress, keyed by server key. Each
+# future resolves to the started server, or None if the start failed.
+_inflight_starts: Dict[str, asyncio.Future] = {}
+
+
+@dataclass(frozen=True)
+class StartOptions:
+    """
+    Options for starting a MATLAB proxy server via proxy manager.
+    """
+
+    # The identifier for the caller (kernel id for kernels, "jsp" for JSP)
+    caller_id: str
+    # The context in which the server is being started (parent pid)
+    ctx: str
+    # Flag indicating if the MATLAB proxy is shared
+    is_shared_matlab: bool
+    # Authentication token for the MATLAB proxy manager
+    mpm_auth_token: Optional[str] = None
+
 
 async def start_matlab_proxy_for_kernel(
     caller_id: str, parent_id: str, is_shared_matlab: bool
@@ -30,7 +66,9 @@ async def start_matlab_proxy_for_kernel(
     set to None, for starting the MATLAB proxy server via proxy manager.
     """
     return await _start_matlab_proxy(
-        caller_id=caller_id, ctx=parent_id, is_shared_matlab=is_shared_matlab
+        StartOptions(
+            caller_id=caller_id, ctx=parent_id, is_shared_matlab=is_shared_matlab
+        )
     )
 
 
@@ -44,28 +82,27 @@ async def start_matlab_proxy_for_jsp(
     a more specific context (mpm_auth_token) for starting the MATLAB proxy server via proxy manager.
     """
     return await _start_matlab_proxy(
-        caller_id="jsp",
-        ctx=parent_id,
-        is_shared_matlab=is_shared_matlab,
-        mpm_auth_token=mpm_auth_token,
+        StartOptions(
+            caller_id="jsp",
+            ctx=parent_id,
+            is_shared_matlab=is_shared_matlab,
+            mpm_auth_token=mpm_auth_token,
+        )
     )
 
 
-async def _start_matlab_proxy(**options) -> dict:
+async def _start_matlab_proxy(options: StartOptions) -> dict:
     """
     Starts a MATLAB proxy server with the specified options.
 
     This function validates the provided options, checks for existing server instances,
     and either returns an existing server process or starts a new MATLAB proxy server.
-    It ensures that required arguments are present, handles token generation, and manages
-    server readiness and error handling.
+    Concurrent calls for the same server wait for the first one to start it, instead
+    of starting duplicate servers.
+    It handles token generation, and manages server readiness and error handling.
 
     Args:
-        **options: Arbitrary keyword arguments containing the following keys:
-            - caller_id (str): The identifier for the caller (kernel id for kernels, "jsp" for JSP).
-            - ctx (str): The context in which the server is being started (parent pid).
-            - is_shared_matlab (bool): Flag indicating if the MATLAB proxy is shared.
-            - mpm_auth_token (Optional[str]): Authentication token for the MATLAB proxy manager.
+        options (StartOptions): The options for starting the MATLAB proxy server.
 
     Returns:
         dict: A dictionary representation of the server process, including any errors encountered.
@@ -73,27 +110,16 @@ async def _start_matlab_proxy(**options) -> dict:
     Raises:
         ValueError: If `caller_id` is "default" and `is_shared_matlab` is False.
     """
-    # Validate arguments
-    required_args: List[str] = ["caller_id", "ctx", "is_shared_matlab"]
-    missing_args: List[str] = [arg for arg in required_args if arg not in options]
-
-    if missing_args:
-        raise ValueError(f"Missing required arguments: {', '.join(missing_args)}")
-
-    caller_id: str = options["caller_id"]
-    ctx: str = options["ctx"]
-    is_shared_matlab: bool = options.get("is_shared_matlab", True)
-    mpm_auth_token: Optional[str] = options.get("mpm_auth_token", None)
+    caller_id = options.caller_id
+    ctx = options.ctx
+    is_shared_matlab = options.is_shared_matlab
 
     if not is_shared_matlab and caller_id == "default":
         raise ValueError(
             "Caller id cannot be default when matlab proxy is not shareable"
         )
 
-    mpm_auth_token = mpm_auth_token or secrets.token_hex(32)
-
-    # Cleanup stale entries before starting new instance of matlab proxy server
-    helpers._are_orphaned_servers_deleted(ctx)
+    mpm_auth_token = options.mpm_auth_token or auth.generate_token_hex(32)
 
     ident = caller_id if not is_shared_matlab else "default"
     key = f"{ctx}_{ident}"
@@ -107,6 +133,34 @@ async def _start_matlab_proxy(**options) -> dict:
     data_dir = helpers.create_and_get_proxy_manager_data_dir()
     server_process = ServerProcess.find_existing_server(data_dir, key)
 
+    # Stale entries only need to be cleaned up when a new instance of matlab proxy
+    # server is about to be started, so aliasing onto a running server skips it.
+    # Checking the pid is cheap, but the server is also probed as its pid may have
+    # been reused by another process, or the server may have stopped responding.
+    if not (
+        server_process
+        and helpers.does_process_exist(server_process.pid)
+        and await helpers.is_server_ready_async(
+            url=server_process.absolute_url, retries=0
+        )
+    ):
+        if server_process is None:
+            _delete_orphaned_servers(ctx)
+        else:
+            # Always cleanup if the existing server is gone, so that its stale state
+            # files are not picked up by the new server
+            _delete_orphaned_servers(ctx, force=True)
+            # The cleanup keeps the server if it finds it alive after all (e.g. the
+            # probe above timed out), in which case it must be aliased onto rather
+            # than duplicated
+            ServerProcess.clear_cached_server(data_dir, key)
+            server_process = ServerProcess.find_existing_server(data_dir, key)
+
+    # Another caller may already be starting this server, wait for it to alias onto it
+    while server_process is None and key in _inflight_starts:
+        log.debug("Waiting for the server being started by another caller")
+        server_process = await asyncio.shield(_inflight_starts[key])
+
     if server_process:
         log.debug("Found existing server for aliasing")
 
@@ -117,12 +171,20 @@ async def _start_matlab_proxy(**options) -> dict:
 
     # Create a new matlab proxy server
     else:
+        inflight_start = asyncio.get_running_loop().create_future()
+        _inflight_starts[key] = inflight_start
         try:
+            # The newly created server is stored into filesystem once it is ready
             server_process = await _start_subprocess_and_check_for_readiness(
-                ident, ctx, key, is_shared_matlab, mpm_auth_token
+                ident,
+                ctx,
+                key,
+                is_shared_matlab,
+                mpm_auth_token,
+                data_dir,
+                f"{ctx}_{caller_id}",
             )
-            # Store the newly created server into filesystem
-            helpers.create_state_file(data_dir, server_process, f"{ctx}_{caller_id}")
+            inflight_start.set_result(server_process)
             return server_process.as_dict()
 
         # Return a server process instance with the errors information set
@@ -133,10 +195,46 @@ async def _start_matlab_proxy(**options) -> dict:
         except Exception as e:
             log.error("Error starting matlab proxy server: %s", str(e))
             return ServerProcess(errors=[str(e)]).as_dict()
+        finally:
+            # Callers waiting on a failed start go on to start the server themselves
+            if not inflight_start.done():
+                inflight_start.set_result(None)
+            del _inflight_starts[key]
+
+
+def _delete_orphaned_servers(ctx: str, force: bool = False) -> None:
+    """
+    Cleans up orphaned servers for the given context, unless that was recently done.
+
+    Cleanup is best-effort, so bursts of server starts for the same context are
+    coalesced into a single cleanup within _ORPHAN_SWEEP_MIN_INTERVAL.
+
+    Args:
+        ctx (str): The context (parent pid) of the servers to clean up.
+        force (bool): Cleanup even if it was recently done for this context.
+    """
+    now = time.monotonic()
+    last_sweep = _last_orphan_sweeps.get(ctx)
+    if (
+        not force
+        and last_sweep is not None
+        and now - last_sweep < _ORPHAN_SWEEP_MIN_INTERVAL
+    ):
+        log.debug("Orphaned servers were recently cleaned up for ctx=%s", ctx)
+        return
+
+    helpers._are_orphaned_servers_deleted(ctx)
+    _last_orphan_sweeps[ctx] = now
 
 
 async def _start_subprocess_and_check_for_readiness(
-    server_id: str, ctx: str, key: str, is_shared_matlab: bool, mpm_auth_token: str
+    server_id: str,
+    ctx: str,
+    key: str,
+    is_shared_matlab: bool,
+    mpm_auth_token: str,
+    data_dir,
+    state_filename: str,
 ) -> ServerProcess:
     """
     Starts a MATLAB proxy server.
@@ -145,7 +243,8 @@ async def _start_subprocess_and_check_for_readiness(
     1. Prepares the command and environment variables required to start the MATLAB proxy server.
     2. Initializes the MATLAB proxy process.
     3. Checks if the MATLAB proxy server is ready.
-    4. Creates and returns a ServerProcess instance if the server is ready.
+    4. Stores the server into a state file and returns the ServerProcess instance if
+       the server is ready.
 
     Args:
         server_id (str): Unique identifier for the server.
@@ -153,12 +252,15 @@ async def _start_subprocess_and_check_for_readiness(
         key (str): Unique key for identifying the server process.
         is_shared_matlab (bool): Indicates if the MATLAB instance is shared.
         mpm_auth_token (str): Authentication token for MATLAB proxy manager.
+        data_dir: The directory where the state file is created.
+        state_filename (str): The name of the state file for the caller.
 
     Returns:
         ServerProcess: An instance representing the MATLAB proxy server process.
 
     Raises:
         ServerReadinessError: If the MATLAB proxy server is not ready after retries.
+        IOError: If the state file for the server could not be created.
     """
     log.debug("Starting new matlab proxy server")
 
@@ -183,24 +285,61 @@ async def _start_subprocess_and_check_for_readiness(
     )
 
     # Check for the matlab proxy server readiness - with retries
-    if not helpers.is_server_ready(
-        url=matlab_proxy_process.absolute_url, retries=7, backoff_factor=0.5
-    ):
+    if not await _wait_for_server_readiness(matlab_proxy_process.absolute_url):
         log.error(
             "MATLAB Proxy Server unavailable: matlab-proxy-app failed to start or has timed out."
         )
         matlab_proxy_process.shutdown()
         raise exceptions.ServerReadinessError()
 
+    # The server is stored into filesystem only once it is ready, as other processes
+    # alias onto the stored server and clean it up if it isn't responding
+    try:
+        await asyncio.get_running_loop().run_in_executor(
+            None,
+            helpers.create_state_file,
+            data_dir,
+            matlab_proxy_process,
+            state_filename,
+        )
+    except IOError:
+        # The server can't be tracked without its state file
+        matlab_proxy_process.shutdown()
+        raise
+
     return matlab_proxy_process
 
 
-def _prepare_cmd_and_env_for_matlab_proxy(server_id: str):
+async def _wait_for_server_readiness(url: Optional[str]) -> bool:
     """
-    Prepare the command and environment variables for starting the MATLAB proxy.
+    Waits for the matlab-proxy subprocess to be ready, by probing it over HTTP.
+
+    Readiness is not detected from the output of matlab-proxy, as the server outlives
+    its caller and must not depend on the caller to keep reading its output.
+
+    Args:
+        url (Optional[str]): The absolute URL of the server.
 
     Returns:
-        Tuple: A tuple containing the MATLAB proxy command and environment variables.
+        bool: True if the server is ready, False otherwise.
+    """
+    # matlab-proxy usually starts serving within a few seconds, so the first retries
+    # are short
+    return await helpers.is_server_ready_async(
+        url=url, backoff_factor=0.25, timeout=_SERVER_READY_TIMEOUT
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _get_extension_name() -> str:
+    """
+    Get the name of the config used to start the MATLAB proxy.
+
+    The config is resolved once per process. It is imported lazily rather than at
+    module level, as jupyter_matlab_proxy itself depends on this package.
+
+    Returns:
+        str: The extension name from the config.
     """
     # Get config from matlab_proxy module if jupyter_matlab_proxy module is not available
     try:
@@ -208,21 +347,33 @@ def _prepare_cmd_and_env_for_matlab_proxy(server_id: str):
     except ImportError:
         from matlab_proxy.default_configuration import config
 
+    return config.get("extension_name")
+
+
+def _prepare_cmd_and_env_for_matlab_proxy(server_id: str):
+    """
+    Prepare the command and environment variables for starting the MATLAB proxy.
+
+    Returns:
+        Tuple: A tuple containing the MATLAB proxy command and environment variables.
+    """
     # Get the command to start matlab-proxy
     matlab_proxy_cmd: list = [
         matlab_proxy.get_executable_name(),
         "--config",
-        config.get("extension_name"),
+        _get_extension_name(),
     ]
 
     mwi_base_url: str = f"{constants.MWI_BASE_URL_PREFIX}{server_id}"
     input_env: dict = {
-        "MWI_AUTH_TOKEN": secrets.token_urlsafe(32),
+        "MWI_AUTH_TOKEN": auth.generate_token_urlsafe(32),
         "MWI_BASE_URL": mwi_base_url,
     }
 
-    matlab_proxy_env: dict = os.environ.copy()
-    matlab_proxy_env.update(input_env)
+    # matlab-proxy and MATLAB depend on a wide range of user environment variables
+    # (licensing, proxies, display, library paths), so the whole environment is passed on.
+    # Merging in a single step builds the environment dict only once.
+    matlab_proxy_env: dict = {**os.environ, **input_env}
 
     return matlab_proxy_cmd, matlab_proxy_env
 
@@ -236,8 +387,7 @@ async def _start_subprocess(cmd: list, env: dict) -> Tuple[int, str]:
         env (dict): The environment variables to set for the subprocess.
 
     Returns:
-        Optional[Tuple[int, str]]: A tuple containing the process ID, the URL
-        of the server, or None if the process fails to start.
+        Tuple[int, str]: A tuple containing the process ID and the URL of the server.
     """
 
     process = None
@@ -270,7 +420,10 @@ async def _initialize_process_based_on_os_type(cmd, env):
     Initializes and starts a subprocess based on the operating system.
 
     This function attempts to create a subprocess using the provided command and
-    environment variables. It handles both POSIX and Windows systems differently.
+    environment variables. The subprocess is created through asyncio so that spawning
+    it doesn't block the event loop. Event loops which don't support subprocesses
+    (e.g. the SelectorEventLoop used by kernels on Windows) spawn it with
+    subprocess.Popen in the default executor instead.
 
     Args:
         cmd (list): The command to execute the subprocess.
@@ -282,24 +435,44 @@ async def _initialize_process_based_on_os_type(cmd, env):
     Raises:
         exceptions.ProcessStartError: If the subprocess fails to start.
     """
+    # kernel sporadically ends up cleaning the child matlab-proxy process during the
+    # restart workflow. This is a workaround to handle that race condition which leads
+    # to starting matlab-proxy in a new process group and is not counted for deletion.
+    # https://github.com/ipython/ipykernel/blob/main/ipykernel/kernelbase.py#L1283
+    if mwi_sys.is_posix():
+        # On Linux with Python 3.10+, subprocess spawns the child with vfork() even with
+        # start_new_session, so the page tables of a large caller (e.g. a kernel) are not
+        # copied. Calling os.posix_spawn directly would gain nothing over that, while
+        # having to re-implement the pipes and child reaping which asyncio handles.
+        os_specific_kwargs: dict = {"start_new_session": True}
+    else:
+        os_specific_kwargs = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+
+    spawn_kwargs = dict(
+        env=env,
+        # matlab-proxy (and MATLAB, which inherits them) outlives its caller, so it
+        # would block once an undrained stdout or stderr pipe inherited from the
+        # caller fills up, or die of SIGPIPE once the caller has exited. Both are
+        # discarded; matlab-proxy can still log to a file through MWI_LOG_FILE.
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        **os_specific_kwargs,
+    )
+    loop = asyncio.get_running_loop()
+
     try:
-        if mwi_sys.is_posix():
-            log.debug("Starting matlab proxy subprocess for posix")
-            return await asyncio.create_subprocess_exec(
-                *cmd,
-                env=env,
-                # kernel sporadically ends up cleaning the child matlab-proxy process during the
-                # restart workflow. This is a workaround to handle that race condition which leads
-                # to starting matlab-proxy in a new process group and is not counted for deletion.
-                # https://github.com/ipython/ipykernel/blob/main/ipykernel/kernelbase.py#L1283
-                start_new_session=True,
-            )
-        else:
-            log.debug("Starting matlab proxy subprocess for windows")
-            return subprocess.Popen(
-                cmd,
-                env=env,
-            )
+        log.debug("Starting matlab proxy subprocess")
+        # On Windows, only the ProactorEventLoop supports asyncio subprocesses, while
+        # ipykernel installs a SelectorEventLoop for compatibility with tornado
+        if mwi_sys.is_posix() or isinstance(loop, asyncio.ProactorEventLoop):
+            try:
+                return await asyncio.create_subprocess_exec(*cmd, **spawn_kwargs)
+            except NotImplementedError:
+                log.debug("Event loop doesn't support subprocesses, using Popen")
+
+        return await loop.run_in_executor(
+            None, functools.partial(subprocess.Popen, cmd, **spawn_kwargs)
+        )
     except Exception as e:
         log.error("Failed to create matlab-proxy subprocess: %s", e)
         raise exceptions.ProcessStartError(extra_info=str(e)) from e
@@ -311,7 +484,7 @@ async def shutdown(parent_pid: str, caller_id: str, mpm_auth_token: str):
 
     This function attempts to shut down the MATLAB proxy server identified by the
     given context and ID, provided the correct authentication token is supplied.
-    It ensures that the shutdown process is thread-safe using an asyncio lock.
+    It ensures that the shutdown process is thread-safe using an asyncio lock per server.
 
     Args:
         parent_pid (str): The context identifier for the server.
@@ -333,11 +506,15 @@ async def shutdown(parent_pid: str, caller_id: str, mpm_auth_token: str):
         )
         return
 
+    # File system and backend server operations are blocking, so they are run in
+    # the default executor to keep the event loop responsive
+    loop = asyncio.get_running_loop()
+
     try:
         data_dir = helpers.create_and_get_proxy_manager_data_dir()
         storage = FileRepository(data_dir)
         filename = f"{parent_pid}_{caller_id}"
-        full_file_path, server = storage.get(filename)
+        full_file_path, server = await loop.run_in_executor(None, storage.get, filename)
 
         if not server:
             log.debug("State file for this server not found, filename: %s", filename)
@@ -350,12 +527,17 @@ async def shutdown(parent_pid: str, caller_id: str, mpm_auth_token: str):
         # all on Kernel UI sends shutdown request in parallel which could lead
         # to a scenario where the kernels' shutdown just cleans the files from
         # filesystem and doesn't shut down the backend matlab proxy server.
-        async with shutdown_lock:
-            if helpers.is_only_reference(full_file_path):
-                server.shutdown()
+        # The lock is per server, so that shutdowns of unrelated servers don't
+        # wait on each other.
+        async with _get_shutdown_lock(server.id):
+            if await loop.run_in_executor(
+                None, helpers.is_only_reference, full_file_path
+            ):
+                await loop.run_in_executor(None, server.shutdown)
 
             # Delete the file for this server
-            storage.delete(f"{filename}.info")
+            await loop.run_in_executor(None, storage.delete, f"{filename}.info")
+            ServerProcess.clear_cached_server(data_dir, server.id)
     except FileNotFoundError as e:
         log.error("State file for server %s not found: %s", filename, e)
         return
@@ -365,3 +547,22 @@ async def shutdown(parent_pid: str, caller_id: str, mpm_auth_token: str):
     except Exception as e:
         log.error("Error during shutdown of server %s: %s", filename, e)
         raise
+
+
+def _get_shutdown_lock(server_id: str) -> asyncio.Lock:
+    """
+    Returns the lock serializing the shutdown of the given matlab proxy server.
+
+    Args:
+        server_id (str): The id of the server, shared by all callers aliasing onto it.
+
+    Returns:
+        asyncio.Lock: The shutdown lock for the server.
+    """
+    loop_locks = _shutdown_locks.setdefault(
+        asyncio.get_running_loop(), weakref.WeakValueDictionary()
+    )
+    lock = loop_locks.get(server_id)
+    if lock is None:
+        lock = loop_locks[server_id] = asyncio.Lock()
+    return lock
@@ -1,8 +1,9 @@
 # Copyright 2024-2025 The MathWorks, Inc.
 import json
+import os
 from dataclasses import asdict, dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
 import psutil
 
@@ -10,6 +11,22 @@ from matlab_proxy_manager.utils import helpers, logger
 
 log = logger.get()
 
+# Servers found by ServerProcess.find_existing_server, keyed by the path of the server's
+# directory. Each entry also holds the (mtime, inode) of that directory when it was read.
+_existing_servers: Dict[str, Tuple[Tuple[int, int], "ServerProcess"]] = {}
+
+
+def _get_dir_signature(dir_path: Path) -> Optional[Tuple[int, int]]:
+    """
+    Returns the (mtime, inode) of a directory, which changes whenever files are
+    added to or removed from it, or None if it can't be read.
+    """
+    try:
+        dir_stat = os.stat(dir_path)
+    except OSError:
+        return None
+    return dir_stat.st_mtime_ns, dir_stat.st_ino
+
 
 @dataclass
 class ServerProcess:
@@ -142,6 +159,9 @@ class ServerProcess:
         """
         Finds an existing server process by reading the server configuration from a file.
 
+        The server is cached in memory and read again only when files are added to or
+        removed from its directory.
+
         Args:
             data_dir (str): The directory where server configuration files are stored.
             key (str): The key corresponding to the specific server configuration.
@@ -153,6 +173,11 @@ class ServerProcess:
         key_dir = Path(data_dir, key)
         server_process = None
 
+        dir_signature = _get_dir_signature(key_dir)
+        cached_server = _existing_servers.get(str(key_dir))
+        if dir_signature and cached_server and cached_server[0] == dir_signature:
+            return cached_server[1]
+
         # Return early if the directory is not found
         if not key_dir.is_dir():
             return server_process
@@ -169,4 +194,18 @@ class ServerProcess:
         except (OSError, ValueError) as ex:
             log.debug("Exception while checking for existing server: %s", ex)
 
+        if dir_signature and server_process:
+            _existing_servers[str(key_dir)] = (dir_signature, server_process)
+
         return server_process
+
+    @staticmethod
+    def clear_cached_server(data_dir, key: str) -> None:
+        """
+        Removes a server process from the cache used by find_existing_server.
+
+        Args:
+            data_dir (str): The directory where server configuration files are stored.
+            key (str): The key corresponding to the specific server configuration.
+        """
+        _existing_servers.pop(str(Path(data_dir, key)), None)
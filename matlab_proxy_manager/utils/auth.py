@@ -1,4 +1,7 @@
-# Copyright 2024 The MathWorks, Inc.
+# Copyright 2024-2025 The MathWorks, Inc.
+import base64
+import os
+import threading
 from hmac import compare_digest
 
 from aiohttp import web
@@ -9,6 +12,65 @@ from matlab_proxy_manager.utils.constants import HEADER_MWI_MPM_AUTH_TOKEN
 log = logger.get()
 
 
+class _RandomBytesPool:
+    """
+    Hands out random bytes from a buffer filled by os.urandom, so that generating
+    several tokens in a row reads from the OS random source only once.
+    """
+
+    _REFILL_SIZE = 1024
+
+    def __init__(self) -> None:
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+
+    def draw(self, nbytes: int) -> bytes:
+        """Returns nbytes random bytes, which are never handed out again."""
+        with self._lock:
+            if len(self._buffer) < nbytes:
+                self._buffer.extend(os.urandom(max(nbytes, self._REFILL_SIZE)))
+            random_bytes = bytes(self._buffer[:nbytes])
+            del self._buffer[:nbytes]
+            return random_bytes
+
+    def reset(self) -> None:
+        """Discards the buffered bytes."""
+        self._buffer = bytearray()
+        self._lock = threading.Lock()
+
+
+_random_bytes_pool = _RandomBytesPool()
+
+# A forked child must not hand out the same bytes as its parent
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_random_bytes_pool.reset)
+
+
+def generate_token_hex(nbytes: int = 32) -> str:
+    """Returns a random token in hexadecimal, equivalent to secrets.token_hex.
+
+    Args:
+        nbytes (int): Number of random bytes in the token.
+
+    Returns:
+        str: The token.
+    """
+    return _random_bytes_pool.draw(nbytes).hex()
+
+
+def generate_token_urlsafe(nbytes: int = 32) -> str:
+    """Returns a random URL-safe token, equivalent to secrets.token_urlsafe.
+
+    Args:
+        nbytes (int): Number of random bytes in the token.
+
+    Returns:
+        str: The Base64 encoded token.
+    """
+    token = base64.urlsafe_b64encode(_random_bytes_pool.draw(nbytes))
+    return token.rstrip(b"=").decode("ascii")
+
+
 async def authenticate_request(request):
     """Authenticates incoming request by verifying whether the expected token is in the request.
 
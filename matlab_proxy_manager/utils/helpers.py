@@ -1,6 +1,9 @@
 # Copyright 2024-2025 The MathWorks, Inc.
+import asyncio
+import functools
 import http
 import os
+import random
 import socket
 import time
 from contextlib import contextmanager
@@ -8,6 +11,7 @@ from pathlib import Path
 from typing import Dict, Generator, Optional, Tuple
 from urllib.parse import urlparse
 
+import aiohttp
 import psutil
 import requests
 from aiohttp import web
@@ -20,6 +24,15 @@ from matlab_proxy_manager.utils import logger
 
 log = logger.get()
 
+# Identifier present in the index page served by matlab-proxy
+_MATLAB_PROXY_INDEX_PAGE_IDENTIFIER = "MWI_MATLAB_PROXY_IDENTIFIER"
+
+# Timeout (in seconds) for each readiness request sent to matlab-proxy
+_SERVER_READY_REQUEST_TIMEOUT = 5
+
+# Upper bound (in seconds) for the delay between readiness requests
+_SERVER_READY_MAX_BACKOFF = 8
+
 
 def is_server_ready(url: Optional[str], retries: int = 2, backoff_factor=None) -> bool:
     """
@@ -38,20 +51,90 @@ def is_server_ready(url: Optional[str], retries: int = 2, backoff_factor=None) -
             log.debug("Invalid URL provided: %s", url)
             return False
 
-        matlab_proxy_index_page_identifier = "MWI_MATLAB_PROXY_IDENTIFIER"
         resp = requests_retry_session(
             retries=retries, backoff_factor=backoff_factor
         ).get(f"{url}", verify=False)
         log.debug("Response status code from server readiness: %s", resp.status_code)
         return (
             resp.status_code == http.HTTPStatus.OK
-            and matlab_proxy_index_page_identifier in resp.text
+            and _MATLAB_PROXY_INDEX_PAGE_IDENTIFIER in resp.text
         )
     except Exception as e:
         log.debug("Couldn't reach the server with error: %s", e)
         return False
 
 
+async def is_server_ready_async(
+    url: Optional[str],
+    retries: int = 2,
+    backoff_factor=None,
+    timeout: Optional[float] = None,
+) -> bool:
+    """
+    Check if the server at the given URL is ready, without blocking the event loop.
+
+    Retries use a capped exponential backoff with jitter, so that servers started
+    together don't probe in lockstep. The backoff is reset whenever the server
+    responds, as it is then only a matter of time before it is ready.
+
+    Args:
+        url (str): The URL of the server.
+        retries (int): The number of retries, unless a timeout is given.
+        backoff_factor (float): The backoff factor for retries.
+        timeout (float, optional): Time (in seconds) for which to keep retrying. If
+            given, retries are bounded by this time instead of by their number.
+
+    Returns:
+        bool: True if the server is ready, False otherwise.
+    """
+    # Validate URL
+    parsed_url = urlparse(url)
+    if not all([parsed_url.scheme, parsed_url.netloc]):
+        log.debug("Invalid URL provided: %s", url)
+        return False
+
+    backoff_factor = backoff_factor or 0
+    deadline = None if timeout is None else time.monotonic() + timeout
+    request_timeout = aiohttp.ClientTimeout(total=_SERVER_READY_REQUEST_TIMEOUT)
+    attempt = 0
+    backoff_attempt = 0
+    async with aiohttp.ClientSession(timeout=request_timeout) as session:
+        while True:
+            try:
+                async with session.get(f"{url}", ssl=False) as resp:
+                    log.debug(
+                        "Response status code from server readiness: %s", resp.status
+                    )
+                    if (
+                        resp.status == http.HTTPStatus.OK
+                        and _MATLAB_PROXY_INDEX_PAGE_IDENTIFIER in await resp.text()
+                    ):
+                        return True
+                # Server is accepting connections, retry quickly
+                backoff_attempt = 0
+            except Exception as e:
+                log.debug("Couldn't reach the server with error: %s", e)
+
+            attempt += 1
+            delay = min(
+                _SERVER_READY_MAX_BACKOFF, backoff_factor * (2**backoff_attempt)
+            )
+            delay *= random.uniform(0.5, 1.0)
+            if deadline is None:
+                if attempt > retries:
+                    break
+            else:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                delay = min(delay, remaining)
+
+            await asyncio.sleep(delay)
+            backoff_attempt += 1
+
+    return False
+
+
 def requests_retry_session(
     retries=3, backoff_factor=0.1, session=None
 ) -> requests.Session:
@@ -110,10 +193,14 @@ def convert_mwi_env_vars_to_header_format(
     }
 
 
+@functools.lru_cache(maxsize=None)
 def create_and_get_proxy_manager_data_dir() -> Path:
     """
     Create and get the proxy manager data directory.
 
+    The directory is created once per process, as the server directories within
+    it are created along with their parents anyway.
+
     Returns:
         Path: The path to the proxy manager data directory.
     """
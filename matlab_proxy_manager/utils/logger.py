@@ -4,11 +4,14 @@
 import logging
 import os
 
+# Whether the logging configuration has already been set up in this process
+_initialized = False
+
 
 # TODO: Consolidate all logging setup into a common module (MATLABProxy, MATLABKernel, MATLABProxyManager)
 def get(init=False):
     """Get the logger used by this application.
-        Set init=True to initialize the logger
+        Set init=True to initialize the logger, which is only done once per process
     Returns:
         Logger: The logger used by this application.
     """
@@ -42,12 +45,18 @@ def __set_logging_configuration():
     Returns:
         Logger: Logger object with the set configuration.
     """
-    # query for user specified environment variables
-    log_level = os.getenv(__get_env_name_logging_level(), __get_default_log_level())
+    global _initialized
 
     ## Set logging object
     logger = __get_mw_logger()
 
+    # Modules importing the logger with init=True would otherwise redo the setup
+    if _initialized:
+        return logger
+
+    # query for user specified environment variables
+    log_level = os.getenv(__get_env_name_logging_level(), __get_default_log_level())
+
     # log_level is either set by environment or is the default value.
     logger.info("Initializing logger with log_level: %s", log_level)
     logger.setLevel(log_level)
@@ -59,6 +68,7 @@ def __set_logging_configuration():
     # Suppress debug logs from the watchdog module
     logging.getLogger("watchdog").setLevel(logging.WARNING)
 
+    _initialized = True
     return logger
 
 
@@ -1,11 +1,22 @@
 # Copyright 2024-2025 The MathWorks, Inc.
+import asyncio
+import gc
+import subprocess
+
 import pytest
 
+import matlab_proxy
 from matlab_proxy_manager.lib import api as mpm_api
 from matlab_proxy_manager.utils import exceptions
 from matlab_proxy_manager.storage.server import ServerProcess
 
 
+@pytest.fixture(autouse=True)
+def reset_orphan_sweeps(monkeypatch):
+    """Fixture to forget about orphaned server cleanups done by other tests."""
+    monkeypatch.setattr(mpm_api, "_last_orphan_sweeps", {})
+
+
 @pytest.fixture
 def mock_server_process(mocker):
     """Fixture to provide a mock ServerProcess."""
@@ -32,7 +43,9 @@ async def test_start_matlab_proxy_value_error():
         match="Caller id cannot be default when matlab proxy is not shareable",
     ):
         await mpm_api._start_matlab_proxy(
-            caller_id=caller_id, ctx=parent_id, is_shared_matlab=is_shared_matlab
+            mpm_api.StartOptions(
+                caller_id=caller_id, ctx=parent_id, is_shared_matlab=is_shared_matlab
+            )
         )
 
 
@@ -70,14 +83,25 @@ async def test_start_matlab_proxy_without_existing_server(mocker, mock_server_pr
     is_shared_matlab = True
 
     result = await mpm_api._start_matlab_proxy(
-        caller_id=caller_id, ctx=parent_id, is_shared_matlab=is_shared_matlab
+        mpm_api.StartOptions(
+            caller_id=caller_id, ctx=parent_id, is_shared_matlab=is_shared_matlab
+        )
     )
 
     mock_delete_dangling_servers.assert_called_once_with(parent_id)
     mock_create_proxy_manager_dir.assert_called_once()
     mock_find_existing_server.assert_called_once()
-    mock_start_subprocess.assert_awaited_once()
-    mock_create_state_file.assert_called_once()
+    mock_start_subprocess.assert_awaited_once_with(
+        "default",
+        parent_id,
+        f"{parent_id}_default",
+        True,
+        mocker.ANY,
+        None,
+        f"{parent_id}_{caller_id}",
+    )
+    # State file of a new server is created once it is ready, by the mocked function
+    mock_create_state_file.assert_not_called()
 
     assert result is not None
     assert result == mock_server_process.as_dict()
@@ -107,6 +131,13 @@ async def test_start_matlab_proxy_with_existing_server(mocker, mock_server_proce
         "matlab_proxy_manager.storage.server.ServerProcess.find_existing_server",
         return_value=mock_server_process,
     )
+    mocker.patch(
+        "matlab_proxy_manager.utils.helpers.does_process_exist", return_value=True
+    )
+    mock_is_server_ready = mocker.patch(
+        "matlab_proxy_manager.utils.helpers.is_server_ready_async",
+        return_value=True,
+    )
     mock_start_subprocess = mocker.patch(
         "matlab_proxy_manager.lib.api._start_subprocess_and_check_for_readiness",
         return_value=None,
@@ -117,12 +148,17 @@ async def test_start_matlab_proxy_with_existing_server(mocker, mock_server_proce
     is_shared_matlab = True
 
     result = await mpm_api._start_matlab_proxy(
-        caller_id=caller_id, ctx=parent_id, is_shared_matlab=is_shared_matlab
+        mpm_api.StartOptions(
+            caller_id=caller_id, ctx=parent_id, is_shared_matlab=is_shared_matlab
+        )
     )
 
-    mock_delete_dangling_servers.assert_called_once_with(parent_id)
+    mock_delete_dangling_servers.assert_not_called()
     mock_create_proxy_manager_dir.assert_called_once()
     mock_find_existing_server.assert_called_once()
+    mock_is_server_ready.assert_awaited_once_with(
+        url=mock_server_process.absolute_url, retries=0
+    )
     mock_start_subprocess.assert_not_called()
     mock_create_state_file.assert_called_once()
 
@@ -130,6 +166,200 @@ async def test_start_matlab_proxy_with_existing_server(mocker, mock_server_proce
     assert result == mock_server_process.as_dict()
 
 
+@pytest.mark.parametrize(
+    "does_process_exist, is_server_ready",
+    [(False, True), (True, False)],
+    ids=["process is gone", "server is not responding"],
+)
+async def test_start_matlab_proxy_with_existing_server_not_running(
+    mocker, mock_server_process, does_process_exist, is_server_ready
+):
+    """
+    Test case for starting a MATLAB proxy when the existing server is not running.
+
+    This test mocks various dependencies and verifies the behavior of the
+    _start_matlab_proxy function when an existing server is found but its
+    process is gone, or its pid is taken by a process which isn't responding.
+    It checks if the function cleans up stale servers and starts a new server
+    instead of aliasing onto the existing one, once the cleanup removed it.
+    """
+    mock_delete_dangling_servers = mocker.patch(
+        "matlab_proxy_manager.utils.helpers._are_orphaned_servers_deleted",
+        return_value=True,
+    )
+    mocker.patch(
+        "matlab_proxy_manager.utils.helpers.create_state_file", return_value=None
+    )
+    mocker.patch(
+        "matlab_proxy_manager.utils.helpers.create_and_get_proxy_manager_data_dir",
+        return_value=None,
+    )
+    mock_find_existing_server = mocker.patch(
+        "matlab_proxy_manager.storage.server.ServerProcess.find_existing_server",
+        side_effect=[mocker.Mock(spec=ServerProcess, pid="1"), None],
+    )
+    mocker.patch(
+        "matlab_proxy_manager.storage.server.ServerProcess.clear_cached_server"
+    )
+    mocker.patch(
+        "matlab_proxy_manager.utils.helpers.does_process_exist",
+        return_value=does_process_exist,
+    )
+    mocker.patch(
+        "matlab_proxy_manager.utils.helpers.is_server_ready_async",
+        return_value=is_server_ready,
+    )
+    mock_start_subprocess = mocker.patch(
+        "matlab_proxy_manager.lib.api._start_subprocess_and_check_for_readiness",
+        return_value=mock_server_process,
+    )
+
+    result = await mpm_api._start_matlab_proxy(
+        mpm_api.StartOptions(
+            caller_id="test_caller", ctx="test_parent", is_shared_matlab=True
+        )
+    )
+
+    mock_delete_dangling_servers.assert_called_once_with("test_parent")
+    assert mock_find_existing_server.call_count == 2
+    mock_start_subprocess.assert_awaited_once()
+    assert result == mock_server_process.as_dict()
+
+
+async def test_start_matlab_proxy_with_existing_server_kept_by_cleanup(
+    mocker, mock_server_process
+):
+    """
+    Test case for starting a MATLAB proxy when the existing server didn't respond
+    to the probe, but was found alive by the cleanup of orphaned servers.
+
+    This test verifies that the _start_matlab_proxy function aliases onto the
+    server kept by the cleanup, instead of starting a duplicate server.
+    """
+    mock_delete_dangling_servers = mocker.patch(
+        "matlab_proxy_manager.utils.helpers._are_orphaned_servers_deleted",
+        return_value=False,
+    )
+    mock_create_state_file = mocker.patch(
+        "matlab_proxy_manager.utils.helpers.create_state_file", return_value=None
+    )
+    mocker.patch(
+        "matlab_proxy_manager.utils.helpers.create_and_get_proxy_manager_data_dir",
+        return_value=None,
+    )
+    mocker.patch(
+        "matlab_proxy_manager.storage.server.ServerProcess.find_existing_server",
+        return_value=mock_server_process,
+    )
+    mock_clear_cached_server = mocker.patch(
+        "matlab_proxy_manager.storage.server.ServerProcess.clear_cached_server"
+    )
+    mocker.patch(
+        "matlab_proxy_manager.utils.helpers.does_process_exist", return_value=True
+    )
+    mocker.patch(
+        "matlab_proxy_manager.utils.helpers.is_server_ready_async",
+        return_value=False,
+    )
+    mock_start_subprocess = mocker.patch(
+        "matlab_proxy_manager.lib.api._start_subprocess_and_check_for_readiness",
+        return_value=None,
+    )
+
+    result = await mpm_api._start_matlab_proxy(
+        mpm_api.StartOptions(
+            caller_id="test_caller", ctx="test_parent", is_shared_matlab=True
+        )
+    )
+
+    mock_delete_dangling_servers.assert_called_once_with("test_parent")
+    mock_clear_cached_server.assert_called_once_with(None, "test_parent_default")
+    mock_start_subprocess.assert_not_called()
+    mock_create_state_file.assert_called_once_with(
+        None, mock_server_process, "test_parent_test_caller"
+    )
+    assert result == mock_server_process.as_dict()
+
+
+def test_orphaned_servers_cleanup_is_coalesced(mocker):
+    """
+    Test case for cleaning up orphaned servers repeatedly for the same context.
+
+    This test verifies that the _delete_orphaned_servers function skips the
+    cleanup if it was recently done for the same context, unless forced.
+    """
+    mock_delete_dangling_servers = mocker.patch(
+        "matlab_proxy_manager.utils.helpers._are_orphaned_servers_deleted",
+        return_value=True,
+    )
+
+    mpm_api._delete_orphaned_servers("test_parent")
+    mpm_api._delete_orphaned_servers("test_parent")
+    mpm_api._delete_orphaned_servers("other_parent")
+    mpm_api._delete_orphaned_servers("test_parent", force=True)
+
+    assert mock_delete_dangling_servers.call_args_list == [
+        mocker.call("test_parent"),
+        mocker.call("other_parent"),
+        mocker.call("test_parent"),
+    ]
+
+
+async def test_concurrent_starts_of_same_server_start_it_once(
+    mocker, mock_server_process
+):
+    """
+    Test case for starting the same MATLAB proxy concurrently.
+
+    This test verifies that concurrent _start_matlab_proxy calls for the same
+    server start a single server, and that the other callers alias onto it.
+    """
+    mocker.patch(
+        "matlab_proxy_manager.utils.helpers._are_orphaned_servers_deleted",
+        return_value=True,
+    )
+    mock_create_state_file = mocker.patch(
+        "matlab_proxy_manager.utils.helpers.create_state_file", return_value=None
+    )
+    mocker.patch(
+        "matlab_proxy_manager.utils.helpers.create_and_get_proxy_manager_data_dir",
+        return_value=None,
+    )
+    mocker.patch(
+        "matlab_proxy_manager.storage.server.ServerProcess.find_existing_server",
+        return_value=None,
+    )
+
+    async def start_server(*args):
+        await asyncio.sleep(0.1)
+        return mock_server_process
+
+    mock_start_subprocess = mocker.patch(
+        "matlab_proxy_manager.lib.api._start_subprocess_and_check_for_readiness",
+        side_effect=start_server,
+    )
+
+    results = await asyncio.gather(
+        mpm_api._start_matlab_proxy(
+            mpm_api.StartOptions(
+                caller_id="kernel_1", ctx="test_parent", is_shared_matlab=True
+            )
+        ),
+        mpm_api._start_matlab_proxy(
+            mpm_api.StartOptions(
+                caller_id="kernel_2", ctx="test_parent", is_shared_matlab=True
+            )
+        ),
+    )
+
+    mock_start_subprocess.assert_awaited_once()
+    mock_create_state_file.assert_called_once_with(
+        None, mock_server_process, "test_parent_kernel_2"
+    )
+    assert results == [mock_server_process.as_dict()] * 2
+    assert not mpm_api._inflight_starts
+
+
 async def test_start_matlab_proxy_returns_error_if_server_not_created(
     mocker, mock_server_process
 ):
@@ -168,7 +398,9 @@ async def test_start_matlab_proxy_returns_error_if_server_not_created(
     is_shared_matlab = True
 
     server_process = await mpm_api._start_matlab_proxy(
-        caller_id=caller_id, ctx=parent_id, is_shared_matlab=is_shared_matlab
+        mpm_api.StartOptions(
+            caller_id=caller_id, ctx=parent_id, is_shared_matlab=is_shared_matlab
+        )
     )
 
     mock_delete_dangling_servers.assert_called_once_with(parent_id)
@@ -211,7 +443,8 @@ async def test_matlab_proxy_is_cleaned_up_if_server_was_not_ready(mocker):
         return_value=None,
     )
     mock_is_server_ready = mocker.patch(
-        "matlab_proxy_manager.utils.helpers.is_server_ready", return_value=False
+        "matlab_proxy_manager.utils.helpers.is_server_ready_async",
+        return_value=False,
     )
     mock_prep_cmd_and_env = mocker.patch(
         "matlab_proxy_manager.lib.api._prepare_cmd_and_env_for_matlab_proxy",
@@ -227,7 +460,9 @@ async def test_matlab_proxy_is_cleaned_up_if_server_was_not_ready(mocker):
     is_shared_matlab = True
 
     server_process = await mpm_api._start_matlab_proxy(
-        caller_id=caller_id, ctx=parent_id, is_shared_matlab=is_shared_matlab
+        mpm_api.StartOptions(
+            caller_id=caller_id, ctx=parent_id, is_shared_matlab=is_shared_matlab
+        )
     )
 
     mock_delete_dangling_servers.assert_called_once_with(parent_id)
@@ -236,7 +471,7 @@ async def test_matlab_proxy_is_cleaned_up_if_server_was_not_ready(mocker):
     mock_create_state_file.assert_not_called()
     mock_prep_cmd_and_env.assert_called_once()
     mock_start_subprocess.assert_awaited_once()
-    mock_is_server_ready.assert_called_once()
+    mock_is_server_ready.assert_awaited_once()
     mock_shutdown.assert_called_once()
 
     assert isinstance(server_process, dict)
@@ -244,6 +479,149 @@ async def test_matlab_proxy_is_cleaned_up_if_server_was_not_ready(mocker):
     assert "MATLAB Proxy Server unavailable" in server_process.get("errors")[0]
 
 
+async def test_readiness_is_probed_over_http(mocker):
+    """
+    Test case for detecting MATLAB proxy readiness.
+
+    This test verifies that the _start_subprocess_and_check_for_readiness function
+    probes the started server over HTTP, and stores it once it is ready.
+    """
+    mocker.patch(
+        "matlab_proxy_manager.lib.api._prepare_cmd_and_env_for_matlab_proxy",
+        return_value=([], {"MWI_BASE_URL": "/matlab/default"}),
+    )
+    mocker.patch(
+        "matlab_proxy_manager.lib.api._start_subprocess",
+        return_value=(1, "http://127.0.0.1:8888"),
+    )
+    mock_is_server_ready = mocker.patch(
+        "matlab_proxy_manager.utils.helpers.is_server_ready_async",
+        return_value=True,
+    )
+    mock_create_state_file = mocker.patch(
+        "matlab_proxy_manager.utils.helpers.create_state_file", return_value=None
+    )
+
+    server_process = await mpm_api._start_subprocess_and_check_for_readiness(
+        "default",
+        "test_parent",
+        "test_parent_default",
+        True,
+        "token",
+        "data_dir",
+        "test_parent_default",
+    )
+
+    mock_is_server_ready.assert_awaited_once_with(
+        url="http://127.0.0.1:8888/matlab/default", backoff_factor=0.25, timeout=60.0
+    )
+    mock_create_state_file.assert_called_once_with(
+        "data_dir", server_process, "test_parent_default"
+    )
+    assert server_process.pid == "1"
+
+
+async def test_matlab_proxy_output_is_not_tied_to_caller(mocker):
+    """
+    Test case for starting the MATLAB proxy subprocess on POSIX systems.
+
+    This test verifies that matlab-proxy is started in a new session, with its
+    output discarded so that it never blocks on or dies of a pipe owned by the caller.
+    """
+    mocker.patch("matlab_proxy.util.system.is_posix", return_value=True)
+    mock_create_subprocess_exec = mocker.patch(
+        "asyncio.create_subprocess_exec", return_value=mocker.Mock(pid=1)
+    )
+
+    await mpm_api._initialize_process_based_on_os_type(["matlab-proxy-app"], {})
+
+    mock_create_subprocess_exec.assert_awaited_once_with(
+        "matlab-proxy-app",
+        env={},
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+async def test_matlab_proxy_is_started_with_popen_on_windows_selector_loop(
+    mocker, monkeypatch
+):
+    """
+    Test case for starting the MATLAB proxy subprocess on Windows from a loop
+    which doesn't support subprocesses.
+
+    This test verifies that matlab-proxy is started with subprocess.Popen in the
+    default executor, when the running loop is not a ProactorEventLoop.
+    """
+    mocker.patch("matlab_proxy.util.system.is_posix", return_value=False)
+    monkeypatch.setattr(
+        "asyncio.ProactorEventLoop", type("ProactorEventLoop", (), {}), raising=False
+    )
+    monkeypatch.setattr(
+        "subprocess.CREATE_NEW_PROCESS_GROUP", 0x00000200, raising=False
+    )
+    mock_create_subprocess_exec = mocker.patch("asyncio.create_subprocess_exec")
+    mock_popen = mocker.patch("subprocess.Popen", return_value=mocker.Mock(pid=1))
+
+    process = await mpm_api._initialize_process_based_on_os_type(
+        ["matlab-proxy-app"], {}
+    )
+
+    assert process is mock_popen.return_value
+    mock_create_subprocess_exec.assert_not_called()
+    mock_popen.assert_called_once_with(
+        ["matlab-proxy-app"],
+        env={},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        creationflags=0x00000200,
+    )
+
+
+async def test_matlab_proxy_is_started_with_popen_if_loop_lacks_subprocesses(mocker):
+    """
+    Test case for starting the MATLAB proxy subprocess from an event loop which
+    doesn't implement subprocesses.
+
+    This test verifies that matlab-proxy is started with subprocess.Popen when
+    asyncio.create_subprocess_exec raises NotImplementedError.
+    """
+    mocker.patch("matlab_proxy.util.system.is_posix", return_value=True)
+    mocker.patch("asyncio.create_subprocess_exec", side_effect=NotImplementedError)
+    mock_popen = mocker.patch("subprocess.Popen", return_value=mocker.Mock(pid=1))
+
+    process = await mpm_api._initialize_process_based_on_os_type(
+        ["matlab-proxy-app"], {}
+    )
+
+    assert process is mock_popen.return_value
+    mock_popen.assert_called_once_with(
+        ["matlab-proxy-app"],
+        env={},
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+
+
+def test_prepare_cmd_and_env_for_matlab_proxy(monkeypatch):
+    """
+    Test case for preparing the command and environment of MATLAB proxy.
+
+    This test verifies that the environment of the caller is passed on to
+    MATLAB proxy along with the variables specific to the server.
+    """
+    monkeypatch.setenv("MLM_LICENSE_FILE", "27000@license-server")
+
+    cmd, env = mpm_api._prepare_cmd_and_env_for_matlab_proxy("default")
+
+    assert cmd[0] == matlab_proxy.get_executable_name()
+    assert env["MLM_LICENSE_FILE"] == "27000@license-server"
+    assert env["MWI_BASE_URL"] == "/matlab/default"
+    assert env["MWI_AUTH_TOKEN"]
+
+
 # Test for shutdown with missing arguments
 async def test_shutdown_missing_args(mocker, mock_server_process):
     """
@@ -308,3 +686,46 @@ async def test_shutdown(mocker, mock_server_process, tmp_path):
         f"{parent_pid}_{caller_id}.info"
     )
     mock_server_process.shutdown.assert_called_once()
+
+
+async def test_shutdown_lock_is_shared_only_by_callers_of_same_server():
+    """
+    Test the locks used to serialize the shutdown of MATLAB proxy servers.
+
+    The test checks if:
+    1. Callers aliasing onto the same server get the same lock
+    2. Callers of different servers get different locks
+    """
+    lock = mpm_api._get_shutdown_lock("ctx_default")
+
+    assert mpm_api._get_shutdown_lock("ctx_default") is lock
+    assert mpm_api._get_shutdown_lock("ctx_kernel_id") is not lock
+
+
+async def test_shutdown_lock_is_dropped_once_unused():
+    """
+    Test that the lock of a server is forgotten once no shutdown uses it anymore.
+    """
+    lock = mpm_api._get_shutdown_lock("ctx_kernel_id")
+    loop_locks = mpm_api._shutdown_locks[asyncio.get_running_loop()]
+    async with lock:
+        assert "ctx_kernel_id" in loop_locks
+
+    del lock
+    gc.collect()
+
+    assert "ctx_kernel_id" not in loop_locks
+
+
+def test_shutdown_lock_is_not_shared_across_event_loops():
+    """
+    Test that the shutdown locks are created for the running event loop.
+
+    asyncio locks can't be used across event loops, so each event loop should
+    get its own lock for the same server.
+    """
+
+    async def get_lock():
+        return mpm_api._get_shutdown_lock("ctx_default")
+
+    assert asyncio.run(get_lock()) is not asyncio.run(get_lock())
@@ -1,4 +1,5 @@
 # Copyright 2024-2025 The MathWorks, Inc.
+import json
 from pathlib import Path
 
 import pytest
@@ -235,3 +236,32 @@ def test_find_existing_server_exception(mocker):
 
     assert result is None
     mock_open.assert_called_once_with(Path("file1"), "r", encoding="utf-8")
+
+
+def test_find_existing_server_is_cached(tmp_path, server_process):
+    key_dir = tmp_path / server_process.id
+    key_dir.mkdir()
+    (key_dir / "default.info").write_text(
+        json.dumps({server_process.id: server_process.as_dict()}), encoding="utf-8"
+    )
+
+    result = ServerProcess.find_existing_server(tmp_path, server_process.id)
+    cached_result = ServerProcess.find_existing_server(tmp_path, server_process.id)
+
+    assert result == server_process
+    assert cached_result is result
+
+
+def test_find_existing_server_cache_is_cleared(tmp_path, server_process):
+    key_dir = tmp_path / server_process.id
+    key_dir.mkdir()
+    (key_dir / "default.info").write_text(
+        json.dumps({server_process.id: server_process.as_dict()}), encoding="utf-8"
+    )
+
+    result = ServerProcess.find_existing_server(tmp_path, server_process.id)
+    ServerProcess.clear_cached_server(tmp_path, server_process.id)
+    uncached_result = ServerProcess.find_existing_server(tmp_path, server_process.id)
+
+    assert uncached_result == result
+    assert uncached_result is not result
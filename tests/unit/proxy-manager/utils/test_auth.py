@@ -0,0 +1,36 @@
+# Copyright 2025 The MathWorks, Inc.
+import base64
+
+from matlab_proxy_manager.utils import auth
+
+
+def test_generate_token_hex():
+    token = auth.generate_token_hex(32)
+
+    assert len(token) == 64
+    assert bytes.fromhex(token)
+
+
+def test_generate_token_urlsafe():
+    token = auth.generate_token_urlsafe(32)
+
+    assert len(base64.urlsafe_b64decode(token + "=")) == 32
+    assert "=" not in token
+
+
+def test_generated_tokens_are_unique():
+    tokens = {auth.generate_token_hex(32) for _ in range(100)}
+
+    assert len(tokens) == 100
+
+
+def test_random_bytes_pool_refills_when_drained(mocker):
+    pool = auth._RandomBytesPool()
+    mock_urandom = mocker.patch(
+        "matlab_proxy_manager.utils.auth.os.urandom", side_effect=lambda n: b"a" * n
+    )
+
+    for _ in range(pool._REFILL_SIZE // 32 + 1):
+        pool.draw(32)
+
+    assert mock_urandom.call_count == 2
@@ -0,0 +1,234 @@
+# Copyright 2025 The MathWorks, Inc.
+import inspect
+import socket
+
+import pytest
+from aiohttp import web
+
+from matlab_proxy_manager.utils import helpers
+
+
+@pytest.fixture
+async def readiness_server(aiohttp_server):
+    """
+    Fixture to provide a server answering each request with the next of the given responses.
+
+    Returns:
+        Callable: Starts a server for the given list of (status, body) responses.
+        The server is given the list of requests it has answered as "requests".
+    """
+
+    async def start(responses):
+        requests = []
+
+        async def handler(request):
+            status, body = responses[min(len(requests), len(responses) - 1)]
+            requests.append(request.path)
+            return web.Response(status=status, text=body)
+
+        app = web.Application()
+        app.router.add_get("/{tail:.*}", handler)
+        server = await aiohttp_server(app)
+        server.requests = requests
+        return server
+
+    return start
+
+
+def test_create_and_get_proxy_manager_data_dir_is_cached(mocker, tmp_path):
+    """
+    Test that the data directory is looked up and created only once per process.
+    """
+    helpers.create_and_get_proxy_manager_data_dir.cache_clear()
+    mock_get_config_folder = mocker.patch(
+        "matlab_proxy_manager.utils.helpers.settings.get_mwi_config_folder",
+        return_value=tmp_path,
+    )
+
+    try:
+        first = helpers.create_and_get_proxy_manager_data_dir()
+        second = helpers.create_and_get_proxy_manager_data_dir()
+    finally:
+        helpers.create_and_get_proxy_manager_data_dir.cache_clear()
+
+    assert first == second == tmp_path / "proxy_manager"
+    assert first.is_dir()
+    mock_get_config_folder.assert_called_once_with(dev=False)
+
+
+async def test_is_server_ready_async(readiness_server):
+    """
+    Test that a server serving the matlab-proxy index page is ready.
+    """
+    server = await readiness_server([(200, "MWI_MATLAB_PROXY_IDENTIFIER")])
+
+    is_ready = await helpers.is_server_ready_async(
+        str(server.make_url("/matlab/default")), retries=2
+    )
+
+    assert is_ready is True
+    assert server.requests == ["/matlab/default"]
+
+
+@pytest.mark.parametrize(
+    "first_response",
+    [(503, "MWI_MATLAB_PROXY_IDENTIFIER"), (200, "Some other page")],
+    ids=["non-OK response", "missing identifier"],
+)
+async def test_is_server_ready_async_retries_until_ready(
+    readiness_server, first_response
+):
+    """
+    Test that the server is probed again while it doesn't serve the matlab-proxy index page.
+    """
+    server = await readiness_server(
+        [first_response, (200, "MWI_MATLAB_PROXY_IDENTIFIER")]
+    )
+
+    is_ready = await helpers.is_server_ready_async(
+        str(server.make_url("/")), retries=2, backoff_factor=0
+    )
+
+    assert is_ready is True
+    assert len(server.requests) == 2
+
+
+async def test_is_server_ready_async_gives_up_after_retries(readiness_server):
+    """
+    Test that the server is not ready if it never serves the matlab-proxy index page.
+    """
+    server = await readiness_server([(503, "")])
+
+    is_ready = await helpers.is_server_ready_async(
+        str(server.make_url("/")), retries=2, backoff_factor=0
+    )
+
+    assert is_ready is False
+    assert len(server.requests) == 3
+
+
+async def test_is_server_ready_async_with_unreachable_server(mocker):
+    """
+    Test that a server refusing connections is not ready, once all retries are used up.
+    """
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    mock_sleep = mocker.patch(
+        "matlab_proxy_manager.utils.helpers.asyncio.sleep", new=mocker.AsyncMock()
+    )
+
+    is_ready = await helpers.is_server_ready_async(
+        f"http://127.0.0.1:{port}", retries=2, backoff_factor=0.5
+    )
+
+    assert is_ready is False
+    assert mock_sleep.await_count == 2
+
+
+@pytest.mark.parametrize("url", [None, "", "127.0.0.1:8888", "http://"])
+async def test_is_server_ready_async_with_invalid_url(mocker, url):
+    """
+    Test that the server is not ready, without sending any request, if the URL is invalid.
+    """
+    mock_client_session = mocker.patch("aiohttp.ClientSession")
+
+    assert await helpers.is_server_ready_async(url) is False
+    mock_client_session.assert_not_called()
+
+
+def test_is_server_ready_async_has_same_signature_as_is_server_ready():
+    """
+    Test that the async readiness probe is a drop-in replacement for the blocking one.
+    """
+    params = list(inspect.signature(helpers.is_server_ready).parameters.values())
+    async_params = list(
+        inspect.signature(helpers.is_server_ready_async).parameters.values()
+    )
+
+    assert async_params[: len(params)] == params
+
+
+def mock_client_session_responses(mocker, outcomes):
+    """
+    Mocks aiohttp.ClientSession to answer each request with the next of the given
+    outcomes, either a response status or an exception to raise.
+    """
+
+    def get(*args, **kwargs):
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = mocker.MagicMock(status=outcome)
+        response.text = mocker.AsyncMock(return_value="")
+        request = mocker.MagicMock()
+        request.__aenter__.return_value = response
+        return request
+
+    session = mocker.MagicMock()
+    session.get.side_effect = get
+    mock_client_session = mocker.patch("aiohttp.ClientSession")
+    mock_client_session.return_value.__aenter__.return_value = session
+
+
+async def test_is_server_ready_async_backoff(mocker, monkeypatch):
+    """
+    Test that the delay between retries grows exponentially up to its cap, with jitter,
+    and is reset whenever the server responds.
+    """
+    # Connection errors, except for a response which isn't the index page yet
+    outcomes = [OSError(), OSError(), OSError(), 503, OSError(), OSError()]
+    mock_client_session_responses(mocker, outcomes)
+    monkeypatch.setattr(helpers, "_SERVER_READY_MAX_BACKOFF", 3)
+    mock_uniform = mocker.patch(
+        "matlab_proxy_manager.utils.helpers.random.uniform", return_value=0.75
+    )
+    mock_sleep = mocker.patch(
+        "matlab_proxy_manager.utils.helpers.asyncio.sleep", new=mocker.AsyncMock()
+    )
+
+    is_ready = await helpers.is_server_ready_async(
+        "http://127.0.0.1:8888", retries=5, backoff_factor=1
+    )
+
+    assert is_ready is False
+    assert not outcomes
+    # Delays of 1, 2, 4 capped to 3 and, after the response, 1 and 2 again
+    assert [call.args[0] for call in mock_sleep.await_args_list] == [
+        0.75,
+        1.5,
+        2.25,
+        0.75,
+        1.5,
+    ]
+    mock_uniform.assert_called_with(0.5, 1.0)
+
+
+async def test_is_server_ready_async_retries_until_timeout(mocker):
+    """
+    Test that retries are bounded by the timeout rather than by their number, if given,
+    so that a server answering quickly but not yet ready is probed for the whole time.
+    """
+    outcomes = [503] * 100
+    mock_client_session_responses(mocker, outcomes)
+    clock = [0.0]
+
+    async def sleep(delay):
+        clock[0] += delay
+
+    mocker.patch(
+        "matlab_proxy_manager.utils.helpers.time.monotonic",
+        side_effect=lambda: clock[0],
+    )
+    mocker.patch("matlab_proxy_manager.utils.helpers.asyncio.sleep", new=sleep)
+    mocker.patch("matlab_proxy_manager.utils.helpers.random.uniform", return_value=1.0)
+
+    is_ready = await helpers.is_server_ready_async(
+        "http://127.0.0.1:8888", retries=2, backoff_factor=0.75, timeout=10
+    )
+
+    assert is_ready is False
+    # The last delay is shortened so that the time is up exactly at the timeout
+    assert clock[0] == 10
+    # Probed every 0.75s, from 0s up to 9.75s and at 10s
+    assert len(outcomes) == 100 - 15
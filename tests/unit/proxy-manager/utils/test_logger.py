@@ -0,0 +1,18 @@
+# Copyright 2025 The MathWorks, Inc.
+import logging
+
+from matlab_proxy_manager.utils import logger
+
+
+def test_get_with_init_configures_logging_once(mocker, monkeypatch):
+    """
+    Test that repeated calls with init=True set up the logging configuration only once.
+    """
+    monkeypatch.setattr(logger, "_initialized", False)
+    mock_basic_config = mocker.patch("logging.basicConfig")
+
+    first = logger.get(init=True)
+    second = logger.get(init=True)
+
+    assert first is second is logging.getLogger("MATLABProxyManager")
+    mock_basic_config.assert_called_once()